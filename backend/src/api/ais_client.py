@@ -1,9 +1,12 @@
 import asyncio
-import json
+import time
+import orjson
+import msgspec
 import websockets
 import ssl
 import certifi
 import logging
+from typing import Optional
 from src.api.broadcaster import manager
 from src.db.repository import AISRepository
 from src.core.anomalies import AnomalyDetector
@@ -11,6 +14,45 @@ from src.core.anomalies import AnomalyDetector
 # Logger configuration
 logger = logging.getLogger(__name__)
 
+# Batch flush policy of the database consumer
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 500
+MAX_BATCH_LATENCY = 2.0  # seconds the oldest buffered record may wait before a flush
+
+
+# --- AISSTREAM MESSAGE SCHEMA ---
+# Field names mirror the AISStream JSON payload; unknown fields are ignored.
+
+class AISPositionReport(msgspec.Struct):
+    """Navigation data shared by Class A and Class B position reports."""
+    Sog: Optional[float] = 0.0
+    Cog: Optional[float] = 0.0
+
+
+class AISMessageBody(msgspec.Struct):
+    """Message envelope, only position reports are relevant for tracking."""
+    PositionReport: Optional[AISPositionReport] = None
+    StandardClassBPositionReport: Optional[AISPositionReport] = None
+
+
+class AISMetaData(msgspec.Struct):
+    """Vessel identity and position attached to every AISStream message."""
+    MMSI: Optional[int] = None
+    ShipName: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class AISMessage(msgspec.Struct):
+    """Top-level AISStream message."""
+    MessageType: str = "Unknown"
+    MetaData: AISMetaData = msgspec.field(default_factory=AISMetaData)
+    Message: AISMessageBody = msgspec.field(default_factory=AISMessageBody)
+
+
+# Compiled decoder: parses raw frames straight into typed structs
+ais_decoder = msgspec.json.Decoder(AISMessage)
+
 
 async def start_ais_ingestion(repo: AISRepository, api_key: str, detector: AnomalyDetector):
     """
@@ -31,36 +73,60 @@ async def start_ais_ingestion(repo: AISRepository, api_key: str, detector: Anoma
         """
         Consumer task that processes buffered data in batches.
 
-        Handles periodic flushing to the database and real-time alerts
-        triggering when geofence violations are detected.
+        A batch is flushed as soon as it reaches the current target size or its
+        oldest record has waited MAX_BATCH_LATENCY seconds. The target size grows
+        under sustained backlog and shrinks back once the queue empties.
+        Handles real-time alerts triggering when geofence violations are detected.
         """
         logger.info("👷 Database consumer and alert engine started.")
-        batch_size = 50
+        batch_target = MIN_BATCH_SIZE
+        backlog = 0.0  # EWMA of the queue depth observed at flush time
         buffer = []
+        batch_start = 0.0
         total_processed = 0
 
         while True:
             try:
-                try:
-                    # Wait for data with a 5s timeout to ensure periodic flushing
-                    data = await asyncio.wait_for(queue.get(), timeout=5.0)
-                    buffer.append(data)
-                except asyncio.TimeoutError:
-                    if buffer:
-                        await process_and_flush(buffer)
-                        total_processed += len(buffer)
-                        buffer.clear()
+                if not buffer:
+                    # Idle: nothing to flush until the first record of a new batch arrives
+                    buffer.append(await queue.get())
+                    queue.task_done()
+                    batch_start = time.monotonic()
+                else:
+                    remaining = MAX_BATCH_LATENCY - (time.monotonic() - batch_start)
+                    if remaining > 0:
+                        try:
+                            buffer.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                            queue.task_done()
+                        except asyncio.TimeoutError:
+                            pass
+
+                # Bulk drain: take everything already queued without awaiting per record
+                while len(buffer) < batch_target:
+                    try:
+                        buffer.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                    queue.task_done()
+
+                batch_full = len(buffer) >= batch_target
+                if not batch_full and time.monotonic() - batch_start < MAX_BATCH_LATENCY:
                     continue
 
-                if len(buffer) >= batch_size:
-                    await process_and_flush(buffer)
-                    total_processed += len(buffer)
+                await process_and_flush(buffer)
+                total_processed += len(buffer)
+                if batch_full:
                     logger.info(
                         f"📊 Batch Flush: {len(buffer)} records. Queue size: {queue.qsize()} | Total: {total_processed}"
                     )
-                    buffer.clear()
+                buffer.clear()
 
-                queue.task_done()
+                # Adapt the batch size to the arrival rate
+                backlog = 0.8 * backlog + 0.2 * queue.qsize()
+                if backlog >= batch_target:
+                    batch_target = min(MAX_BATCH_SIZE, batch_target * 2)
+                elif backlog < batch_target / 4:
+                    batch_target = max(MIN_BATCH_SIZE, batch_target // 2)
 
             except Exception as e:
                 logger.error(f"❌ Consumer error: {e}")
@@ -74,24 +140,34 @@ async def start_ais_ingestion(repo: AISRepository, api_key: str, detector: Anoma
             vessel_batch (list): List of normalized vessel data dictionaries.
         """
         # A. REAL-TIME ANALYSIS (Geofencing)
-        for v in vessel_batch:
-            violation = await detector.check_geofence_violation(v['lat'], v['lon'])
-            if violation:
-                logger.warning(f"🚨 GEOFENCE ALERT: {v['name']} in {violation['name']}")
-                # Broadcast alert to the frontend
-                await manager.broadcast({
+        # Whole batch is verified in a single spatial query
+        points = [(v['lat'], v['lon']) for v in vessel_batch]
+        for idx, violation in await detector.check_geofence_violations_batch(points):
+            v = vessel_batch[idx]
+            logger.warning(f"🚨 GEOFENCE ALERT: {v['name']} in {violation['name']}")
+            # Broadcast alert to the frontend
+            if manager.has_clients():
+                manager.broadcast_threadsafe({
                     "type": "ALERT",
                     "data": violation,
                     "vessel": v['name']
                 })
 
         # B. LIVE MAP BROADCAST
-        # Update frontend with new vessel positions
-        await manager.broadcast({"type": "VESSEL_UPDATE", "data": vessel_batch})
+        # Update frontend with new vessel positions (skipped when no dashboard is connected)
+        if manager.has_clients():
+            manager.broadcast_threadsafe({"type": "VESSEL_UPDATE", "data": vessel_batch})
 
         # C. DATABASE PERSISTENCE
         await repo.update_vessels_batch(vessel_batch)
 
+    # Geofences are checked locally against an in-memory index, refreshed in the background
+    try:
+        await detector.load_geofences()
+    except Exception as e:
+        logger.error(f"❌ Geofence index unavailable, falling back to database checks: {e}")
+    asyncio.create_task(detector.refresh_geofences_periodically())
+
     # Launch consumer task in the background
     asyncio.create_task(db_writer())
 
@@ -106,33 +182,42 @@ async def start_ais_ingestion(repo: AISRepository, api_key: str, detector: Anoma
 
     while True:
         try:
+            # Small JSON frames: skip permessage-deflate to save zlib CPU on every frame
             async with websockets.connect(
                     url,
                     ssl=ssl_context,
                     ping_interval=20,
-                    ping_timeout=20
+                    ping_timeout=20,
+                    open_timeout=10,
+                    compression=None,
+                    max_size=2 ** 20
             ) as ws:
-                await ws.send(json.dumps(subscribe_msg))
+                # Subscription must be sent as a text frame
+                await ws.send(orjson.dumps(subscribe_msg).decode())
                 logger.info("📡 AISStream subscription active.")
 
                 async for message in ws:
-                    msg = json.loads(message)
-                    meta = msg.get("MetaData", {})
+                    try:
+                        msg = ais_decoder.decode(message)
+                    except msgspec.DecodeError as e:
+                        logger.debug(f"Skipping malformed AIS message: {e}")
+                        continue
+
+                    meta = msg.MetaData
+                    report = msg.Message.PositionReport or msg.Message.StandardClassBPositionReport
 
                     # Data normalization logic
                     vessel_data = {
-                        "mmsi": meta.get("MMSI"),
-                        "name": meta.get("ShipName", "Unknown").strip(),
-                        "lat": meta.get("latitude"),
-                        "lon": meta.get("longitude"),
-                        "speed": (msg.get("Message", {}).get("PositionReport") or
-                                  msg.get("Message", {}).get("StandardClassBPositionReport") or {}).get("Sog", 0),
-                        "course": (msg.get("Message", {}).get("PositionReport") or
-                                   msg.get("Message", {}).get("StandardClassBPositionReport") or {}).get("Cog", 0),
-                        "vessel_type": msg.get("MessageType", "Unknown")
+                        "mmsi": meta.MMSI,
+                        "name": (meta.ShipName or "Unknown").strip(),
+                        "lat": meta.latitude,
+                        "lon": meta.longitude,
+                        "speed": report.Sog if report else 0,
+                        "course": report.Cog if report else 0,
+                        "vessel_type": msg.MessageType
                     }
 
-                    if vessel_data["mmsi"] and vessel_data["lat"] is not None:
+                    if vessel_data["mmsi"] and vessel_data["lat"] is not None and vessel_data["lon"] is not None:
                         try:
                             queue.put_nowait(vessel_data)
                         except asyncio.QueueFull:
@@ -1,12 +1,17 @@
 import asyncio
-import json
 import logging
-from typing import List, Dict, Any
+import orjson
+from typing import Set, Dict, Any, Tuple, Optional
 from fastapi import WebSocket
+from fastapi.websockets import WebSocketState
 
 # Logger configuration
 logger = logging.getLogger("Broadcaster")
 
+# Back-pressure limits: a stalled client is dropped instead of stalling the fan-out
+SEND_TIMEOUT = 2.0  # seconds
+MAX_CONCURRENT_SENDS = 100
+
 
 class ConnectionManager:
     """
@@ -17,8 +22,25 @@ class ConnectionManager:
     """
 
     def __init__(self):
-        """Initializes the manager with an empty list of active connections."""
-        self.active_connections: List[WebSocket] = []
+        """Initializes the manager with an empty set of active connections."""
+        self.active_connections: Set[WebSocket] = set()
+        self._send_slots = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        # Event loop serving the client sockets (see bind_loop)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Pending closes of timed-out clients, referenced until they finish
+        self._closing: Set[asyncio.Task] = set()
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """
+        Registers the event loop that owns the client WebSocket connections.
+
+        Required when producers (e.g. AIS ingestion) run on a different
+        event loop thread and publish through broadcast_threadsafe.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The web server's event loop.
+        """
+        self._loop = loop
 
     async def connect(self, websocket: WebSocket):
         """
@@ -28,7 +50,7 @@ class ConnectionManager:
             websocket (WebSocket): The incoming FastAPI WebSocket connection.
         """
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
         logger.info(f"🌐 New client connected. Active connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
@@ -39,15 +61,26 @@ class ConnectionManager:
             websocket (WebSocket): The WebSocket connection to remove.
         """
         if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+            self.active_connections.discard(websocket)
             logger.info(f"🔌 Client disconnected. Remaining connections: {len(self.active_connections)}")
 
+    def has_clients(self) -> bool:
+        """
+        Checks whether any client is connected.
+
+        Lets producers skip building broadcast payloads nobody would receive.
+
+        Returns:
+            bool: True if at least one WebSocket connection is active.
+        """
+        return bool(self.active_connections)
+
     async def broadcast(self, message: Dict[str, Any]):
         """
         Sends a JSON message to all currently connected clients.
 
-        Uses asynchronous gathering to ensure high performance even with
-        multiple connected clients.
+        The payload is serialized to UTF-8 bytes once and the same buffer is
+        sent as a binary frame to every client, avoiding per-client re-encoding.
 
         Args:
             message (Dict[str, Any]): The message payload to broadcast.
@@ -55,32 +88,101 @@ class ConnectionManager:
         if not self.active_connections:
             return
 
-        data = json.dumps(message)
+        await self.broadcast_bytes(orjson.dumps(message))
+
+    async def broadcast_bytes(self, data: bytes):
+        """
+        Sends an already serialized JSON payload to all connected clients.
+
+        Uses asynchronous gathering to ensure high performance even with
+        multiple connected clients, with at most MAX_CONCURRENT_SENDS sends
+        in flight at once.
+
+        Args:
+            data (bytes): Serialized JSON payload (UTF-8).
+        """
+        # Create tasks for parallel execution on a snapshot of the pool
+        tasks = [self._send_safe(connection, data) for connection in list(self.active_connections)]
+        results = await asyncio.gather(*tasks)
+
+        # Prune failed clients once, after every send has completed
+        for websocket, ok in results:
+            if not ok:
+                self.disconnect(websocket)
+
+    def broadcast_threadsafe(self, message: Dict[str, Any]):
+        """
+        Publishes a message from any thread without waiting for delivery.
 
-        # Create tasks for parallel execution
-        tasks = []
-        for connection in self.active_connections:
-            tasks.append(self._send_safe(connection, data))
+        The payload is serialized on the caller's thread, so later changes to
+        the message do not affect it and the web loop does not spend CPU on it.
+        The fan-out is then scheduled on the bound loop (or the caller's loop
+        when none is bound); delivery failures are logged, never raised.
 
-        if tasks:
-            await asyncio.gather(*tasks)
+        Args:
+            message (Dict[str, Any]): The message payload to broadcast.
+        """
+        data = orjson.dumps(message)
+        coro = self.broadcast_bytes(data)
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, self._loop or asyncio.get_running_loop())
+        except RuntimeError as e:
+            # Bound loop already closed (shutdown): nothing left to deliver to
+            coro.close()
+            logger.debug(f"Broadcast skipped: {e}")
+            return
+        future.add_done_callback(_log_broadcast_failure)
 
-    async def _send_safe(self, websocket: WebSocket, message: str):
+    async def _send_safe(self, websocket: WebSocket, message: bytes) -> Tuple[WebSocket, bool]:
         """
-        Safely sends a message to a single client and handles failures.
+        Safely sends a message to a single client and reports failures.
 
-        If a send operation fails, the client is automatically disconnected
-        to prevent system degradation.
+        A send that fails or exceeds SEND_TIMEOUT is reported back so the
+        client can be disconnected to prevent system degradation.
 
         Args:
             websocket (WebSocket): Target connection.
-            message (str): Serialized JSON string.
+            message (bytes): Serialized JSON payload (UTF-8).
+
+        Returns:
+            Tuple[WebSocket, bool]: The target connection and whether the send succeeded.
         """
+        # Skip clients that are already closing
+        if websocket.application_state != WebSocketState.CONNECTED:
+            return websocket, False
+
         try:
-            await websocket.send_text(message)
+            async with self._send_slots:
+                await asyncio.wait_for(websocket.send_bytes(message), timeout=SEND_TIMEOUT)
+            return websocket, True
+        except asyncio.TimeoutError:
+            logger.warning(f"🐢 Client did not accept message within {SEND_TIMEOUT}s, dropping it.")
+            # Close the socket too, so the client sees the drop (1013: try again later)
+            task = asyncio.create_task(self._close_safe(websocket, code=1013))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
         except Exception as e:
             logger.error(f"❌ Failed to send message to client: {e}")
-            self.disconnect(websocket)
+        return websocket, False
+
+    async def _close_safe(self, websocket: WebSocket, code: int):
+        """
+        Closes a dropped client connection without raising.
+
+        Args:
+            websocket (WebSocket): Connection to close.
+            code (int): WebSocket close code sent to the client.
+        """
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=SEND_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Closing dropped client failed: {e}")
+
+
+def _log_broadcast_failure(future):
+    """Reports errors of a broadcast scheduled by broadcast_threadsafe."""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"❌ Broadcast failed: {future.exception()}")
 
 
 # Global manager instance to be imported by main.py
@@ -1,11 +1,151 @@
 import math
+import asyncio
 import logging
+from collections import deque
+from dataclasses import dataclass
+import numpy as np
+import shapely
+from numba import njit
+from scipy.spatial import cKDTree
+from shapely import wkb
+from shapely.strtree import STRtree
 from datetime import datetime, timezone
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 
 # Logger configuration
 logger = logging.getLogger(__name__)
 
+# Geofences are near-static, a periodic reload keeps the in-memory index fresh
+GEOFENCE_REFRESH_INTERVAL = 300  # seconds
+
+# Jamming detection: at least JAMMING_MIN_VESSELS dark targets within JAMMING_RADIUS_KM of each other
+JAMMING_RADIUS_KM = 10.0
+JAMMING_MIN_VESSELS = 3
+EARTH_RADIUS_KM = 6371.0
+
+
+@njit(cache=True)
+def _dr_kernel(lat: float, lon: float, speed: float, course: float, hours_passed: float) -> Tuple[float, float]:
+    """
+    Dead Reckoning for a single vessel state, compiled to native code with Numba.
+
+    Vessels slower than 0.5 knots are considered stationary and keep their last position.
+
+    Returns:
+        Tuple[float, float]: Predicted latitude and longitude.
+    """
+    if speed < 0.5:
+        return lat, lon
+
+    dist_nm = speed * hours_passed
+
+    # Simplified spherical trigonometry (Rhumb Line approximation)
+    # 1 minute of latitude = 1 nautical mile
+    course_rad = math.radians(course)
+    d_lat = (dist_nm * math.cos(course_rad)) / 60.0
+    d_lon = (dist_nm * math.sin(course_rad)) / (60.0 * math.cos(math.radians(lat)))
+
+    return round(lat + d_lat, 6), round(lon + d_lon, 6)
+
+
+@njit(cache=True)
+def _dead_reckoning(lat: np.ndarray, lon: np.ndarray, speed: np.ndarray, course: np.ndarray,
+                    hours_passed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Applies the Dead Reckoning kernel over arrays of vessel states.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Predicted latitudes and longitudes.
+    """
+    pred_lat = np.empty_like(lat)
+    pred_lon = np.empty_like(lon)
+
+    for i in range(lat.shape[0]):
+        pred_lat[i], pred_lon[i] = _dr_kernel(lat[i], lon[i], speed[i], course[i], hours_passed[i])
+
+    return pred_lat, pred_lon
+
+
+@dataclass
+class VesselBatch:
+    """
+    Columnar (structure-of-arrays) view of a set of vessel states.
+
+    Built once from repository rows so that Dead Reckoning and clustering run
+    over contiguous arrays instead of per-vessel dictionary lookups.
+    """
+    mmsi: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    speed: np.ndarray
+    course: np.ndarray
+    last_seen: np.ndarray  # POSIX timestamps (seconds, float64)
+    cluster_id: np.ndarray  # Jamming cluster label per vessel, -1 for none
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "VesselBatch":
+        """
+        Builds the columnar batch from repository rows.
+
+        Args:
+            rows (List[Dict]): Vessel records with 'mmsi', 'lat', 'lon', 'speed',
+                'last_seen' and optionally 'course'.
+
+        Returns:
+            VesselBatch: One array per field, all of the same length.
+        """
+        n = len(rows)
+        return cls(
+            mmsi=np.array([r['mmsi'] for r in rows]),
+            lat=np.fromiter((r['lat'] for r in rows), dtype=np.float64, count=n),
+            lon=np.fromiter((r['lon'] for r in rows), dtype=np.float64, count=n),
+            speed=np.fromiter((r['speed'] for r in rows), dtype=np.float64, count=n),
+            course=np.fromiter((r.get('course', 0.0) for r in rows), dtype=np.float64, count=n),
+            last_seen=np.fromiter((r['last_seen'].timestamp() for r in rows), dtype=np.float64, count=n),
+            cluster_id=np.full(n, -1, dtype=np.int64)
+        )
+
+
+def _dbscan_labels(lat: np.ndarray, lon: np.ndarray, eps_km: float, min_samples: int) -> np.ndarray:
+    """
+    DBSCAN on great-circle distance, backed by a KD-tree.
+
+    Points are mapped to the unit sphere so the great-circle radius becomes an
+    equivalent straight-line (chord) radius the KD-tree can search. A count-only
+    pass classifies core points first; clusters are then expanded with an explicit
+    queue, fetching each core point's neighbour list only when it is dequeued so
+    at most one list is held in memory at a time.
+
+    Returns:
+        np.ndarray: Cluster label per point, -1 for noise.
+    """
+    lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+    xyz = np.column_stack((np.cos(lat_rad) * np.cos(lon_rad), np.cos(lat_rad) * np.sin(lon_rad), np.sin(lat_rad)))
+    chord = 2.0 * math.sin(eps_km / EARTH_RADIUS_KM / 2.0)
+    tree = cKDTree(xyz)
+
+    # Count-only pass runs on all cores (workers=-1) inside scipy, without Python dispatch per point
+    core = tree.query_ball_point(xyz, r=chord, return_length=True, workers=-1) >= min_samples
+    core_idx = np.flatnonzero(core)
+
+    labels = np.full(len(xyz), -1, dtype=np.int64)
+    cluster = 0
+    for seed in core_idx.tolist():
+        if labels[seed] != -1:
+            continue
+
+        labels[seed] = cluster
+        queue = deque([seed])
+        while queue:
+            nb = np.asarray(tree.query_ball_point(xyz[queue.popleft()], r=chord), dtype=np.int64)
+            new = nb[labels[nb] == -1]
+            labels[new] = cluster
+            # Border points join the cluster but do not expand it
+            queue.extend(new[core[new]].tolist())
+        cluster += 1
+
+    return labels
+
 
 class AnomalyDetector:
     """
@@ -23,9 +163,40 @@ class AnomalyDetector:
             repo: The maritime repository for database spatial queries.
         """
         self.repo = repo
+        # In-memory geofence index: (STRtree of polygons, parallel zone metadata)
+        self._geofence_index: Optional[Tuple[STRtree, List[Dict[str, Any]]]] = None
 
-    def calculate_predicted_pos(self, lat: float, lon: float, speed: float, course: float, last_seen: datetime) -> Dict[
-        str, float]:
+    async def load_geofences(self):
+        """
+        Loads all geofence polygons into an in-memory R-tree (STRtree).
+
+        Once loaded, geofence checks are answered locally without any
+        database round-trip.
+        """
+        rows = await self.repo.get_geofences()
+        polygons = [wkb.loads(row['area']) for row in rows]
+        zones = [{"name": row['name'], "severity": row['severity']} for row in rows]
+
+        # Single assignment so readers never see a tree and metadata out of sync
+        self._geofence_index = (STRtree(polygons), zones)
+        logger.info(f"🗺️ Geofence index loaded: {len(zones)} zones.")
+
+    async def refresh_geofences_periodically(self, interval: float = GEOFENCE_REFRESH_INTERVAL):
+        """
+        Background task that periodically reloads the geofence index.
+
+        Args:
+            interval (float): Seconds between reloads. Default is GEOFENCE_REFRESH_INTERVAL.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load_geofences()
+            except Exception as e:
+                logger.error(f"❌ Geofence index refresh failed: {e}")
+
+    def calculate_predicted_pos(self, lat: float, lon: float, speed: float, course: float, last_seen: datetime,
+                                now: Optional[datetime] = None) -> Dict[str, float]:
         """
         Calculates the predicted position of a vessel using Dead Reckoning logic.
 
@@ -38,26 +209,45 @@ class AnomalyDetector:
             speed (float): Vessel speed in knots (SOG).
             course (float): Vessel course in degrees (COG).
             last_seen (datetime): Timestamp of the last received AIS message.
+            now (Optional[datetime]): Reference time, shared when predicting many
+                vessels at once. Defaults to the current UTC time.
 
         Returns:
             Dict[str, float]: A dictionary containing predicted 'lat' and 'lon'.
         """
-        if speed < 0.5:
-            return {"lat": lat, "lon": lon}
+        if now is None:
+            now = datetime.now(timezone.utc)
 
         # Time difference in hours
-        hours_passed = (datetime.now(timezone.utc) - last_seen).total_seconds() / 3600.0
-        dist_nm = speed * hours_passed
+        hours_passed = (now - last_seen).total_seconds() / 3600.0
 
-        # Simplified spherical trigonometry (Rhumb Line approximation)
-        # 1 minute of latitude = 1 nautical mile
-        d_lat = (dist_nm * math.cos(math.radians(course))) / 60.0
-        d_lon = (dist_nm * math.sin(math.radians(course))) / (60.0 * math.cos(math.radians(lat)))
+        pred_lat, pred_lon = _dr_kernel(float(lat), float(lon), float(speed), float(course), hours_passed)
+        return {"lat": pred_lat, "lon": pred_lon}
 
-        return {
-            "lat": round(lat + d_lat, 6),
-            "lon": round(lon + d_lon, 6)
-        }
+    def calculate_predicted_pos_batch(self, lats: np.ndarray, lons: np.ndarray, speeds: np.ndarray,
+                                      courses: np.ndarray, dt_hours: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculates predicted positions for many vessels in a single native pass.
+
+        Array counterpart of calculate_predicted_pos, all inputs share the same length.
+
+        Args:
+            lats (np.ndarray): Last known latitudes.
+            lons (np.ndarray): Last known longitudes.
+            speeds (np.ndarray): Vessel speeds in knots (SOG).
+            courses (np.ndarray): Vessel courses in degrees (COG).
+            dt_hours (np.ndarray): Hours elapsed since each vessel's last AIS message.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Predicted latitudes and longitudes.
+        """
+        return _dead_reckoning(
+            np.ascontiguousarray(lats, dtype=np.float64),
+            np.ascontiguousarray(lons, dtype=np.float64),
+            np.ascontiguousarray(speeds, dtype=np.float64),
+            np.ascontiguousarray(courses, dtype=np.float64),
+            np.ascontiguousarray(dt_hours, dtype=np.float64)
+        )
 
     async def check_geofence_violation(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
         """
@@ -70,12 +260,69 @@ class AnomalyDetector:
         Returns:
             Optional[Dict]: Data of the breached zone if violation exists, else None.
         """
+        if self._geofence_index is not None:
+            tree, zones = self._geofence_index
+            try:
+                hits = tree.query(shapely.Point(lon, lat), predicate="within")
+            except Exception as e:
+                logger.error(f"❌ Geofence verification failed: {e}")
+                return None
+            return zones[hits.min()] if len(hits) else None
+
         try:
             return await self.repo.check_point_in_geofence(lat, lon)
         except Exception as e:
             logger.error(f"❌ Geofence verification failed: {e}")
             return None
 
+    async def check_geofence_violations_batch(self, points: List[Tuple[float, float]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Verifies a batch of coordinates against all active geofence zones at once.
+
+        Args:
+            points (List[Tuple[float, float]]): (lat, lon) pairs, typically one per vessel in a batch.
+
+        Returns:
+            List[Tuple[int, Dict]]: (index into points, breached zone data) for every violation.
+        """
+        if not points:
+            return []
+
+        # Points with missing or non-finite coordinates are skipped; the rest of the batch is still checked
+        try:
+            coords = np.array(points, dtype=np.float64).reshape(-1, 2)
+        except (TypeError, ValueError) as e:
+            logger.error(f"❌ Batch geofence verification failed: {e}")
+            return []
+        valid = np.flatnonzero(np.isfinite(coords).all(axis=1))
+        if len(valid) < len(points):
+            logger.warning(f"⚠️ Skipping {len(points) - len(valid)} points with invalid coordinates.")
+        if not len(valid):
+            return []
+
+        if self._geofence_index is not None:
+            tree, zones = self._geofence_index
+            try:
+                point_idx, zone_idx = tree.query(shapely.points(coords[valid, 1], coords[valid, 0]), predicate="within")
+            except Exception as e:
+                logger.error(f"❌ Batch geofence verification failed: {e}")
+                return []
+
+            # Keep the first zone (in table order) breached by each point
+            first_zone: Dict[int, int] = {}
+            for i, z in zip(valid[point_idx].tolist(), zone_idx.tolist()):
+                if i not in first_zone or z < first_zone[i]:
+                    first_zone[i] = z
+            return [(i, zones[first_zone[i]]) for i in sorted(first_zone)]
+
+        try:
+            rows = await self.repo.check_points_in_geofences_batch([tuple(c) for c in coords[valid].tolist()])
+        except Exception as e:
+            logger.error(f"❌ Batch geofence verification failed: {e}")
+            return []
+
+        return [(int(valid[row['idx']]), {"name": row['name'], "severity": row['severity']}) for row in rows]
+
     async def get_enhanced_anomalies(self, threshold_min: int = 15) -> Dict[str, List[Dict[str, Any]]]:
         """
         Aggregates maritime anomalies for the MCP (Model Context Protocol) server.
@@ -94,38 +341,44 @@ class AnomalyDetector:
             logger.info("✅ No maritime anomalies detected in the current window.")
             return {"alerts": [], "clusters": []}
 
-        alerts = []
-        for v in vessels:
-            predicted = self.calculate_predicted_pos(
-                v['lat'], v['lon'], v['speed'], v.get('course', 0), v['last_seen']
-            )
-            alerts.append({
+        # Columnar copy of the vessel states, shared by every numeric pass below
+        batch = VesselBatch.from_rows(vessels)
+
+        # Dead Reckoning for all inactive vessels in a single vectorized pass
+        now_ts = datetime.now(timezone.utc).timestamp()
+        hours_passed = (now_ts - batch.last_seen) / 3600.0
+
+        pred_lat, pred_lon = self.calculate_predicted_pos_batch(
+            batch.lat, batch.lon, batch.speed, batch.course, hours_passed
+        )
+
+        alerts = [
+            {
                 "mmsi": v['mmsi'],
                 "name": v['name'],
                 "speed": v['speed'],
                 "last_seen": v['last_seen'],
                 "last_pos": {"lat": v['lat'], "lon": v['lon']},
-                "predicted_pos": predicted
-            })
+                "predicted_pos": {"lat": p_lat, "lon": p_lon}
+            }
+            for v, p_lat, p_lon in zip(vessels, pred_lat.tolist(), pred_lon.tolist())
+        ]
 
         # Cluster detection for signal loss (potential jamming)
+        # Density-based clustering on great-circle distance, noise (-1) is dropped
+        batch.cluster_id[:] = _dbscan_labels(batch.lat, batch.lon, JAMMING_RADIUS_KM, JAMMING_MIN_VESSELS)
+
         clusters = []
-        for i, a1 in enumerate(alerts):
-            nearby = []
-            for j, a2 in enumerate(alerts):
-                if i == j: continue
-                # Simple Euclidean distance for clustering (approx. 0.1 deg ~= 10km)
-                dist = math.sqrt((a1['last_pos']['lat'] - a2['last_pos']['lat']) ** 2 +
-                                 (a1['last_pos']['lon'] - a2['last_pos']['lon']) ** 2)
-                if dist < 0.1:
-                    nearby.append(a2['mmsi'])
-
-            if len(nearby) >= 2:
-                clusters.append({
-                    "center": a1['last_pos'],
-                    "affected_mmsi": [a1['mmsi']] + nearby,
-                    "type": "POTENTIAL_JAMMING_ZONE"
-                })
+        for label in np.unique(batch.cluster_id[batch.cluster_id >= 0]):
+            members = np.flatnonzero(batch.cluster_id == label)
+            clusters.append({
+                "center": {
+                    "lat": round(float(batch.lat[members].mean()), 6),
+                    "lon": round(float(batch.lon[members].mean()), 6)
+                },
+                "affected_mmsi": batch.mmsi[members].tolist(),
+                "type": "POTENTIAL_JAMMING_ZONE"
+            })
 
         logger.warning(f"🚨 Found {len(alerts)} inactive vessels and {len(clusters)} jamming clusters.")
         return {"alerts": alerts, "clusters": clusters}
\ No newline at end of file
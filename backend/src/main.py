@@ -1,13 +1,21 @@
 import asyncio
 import os
 import logging
+import threading
 import uvicorn
 import warnings
+from typing import Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from fastmcp import FastMCP
 
+try:
+    # libuv-based event loop for faster socket I/O (not available on Windows)
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Core and database layer imports
 from src.db.session import wait_for_db
 from src.db.repository import AISRepository
@@ -125,6 +133,73 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
+def run_event_loop(coro):
+    """
+    Runs a coroutine to completion on a new event loop (uvloop when available).
+    """
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+
+async def run_ingestion(api_key: str):
+    """
+    AIS ingestion pipeline, executed on its own event loop in a worker thread.
+
+    Keeps AISStream parsing and batch flushing from competing with HTTP,
+    WebSocket and MCP handlers. Database pools are bound to the loop that
+    opened them, so the pipeline uses a dedicated repository and detector.
+    """
+    ingestion_repo = AISRepository(db_url)
+    try:
+        await ingestion_repo.initialize()
+        await start_ais_ingestion(ingestion_repo, api_key, AnomalyDetector(ingestion_repo))
+    except asyncio.CancelledError:
+        logger.info("🛑 AIS ingestion stopped.")
+    except Exception as e:
+        logger.error(f"❌ AIS ingestion crashed: {e}")
+    finally:
+        await ingestion_repo.close()
+
+
+class IngestionThread(threading.Thread):
+    """
+    Worker thread hosting the AIS ingestion event loop.
+
+    Keeps a handle on that loop and its main task so the pipeline can be
+    cancelled from the main loop, letting run_ingestion close its repository.
+    """
+
+    def __init__(self, api_key: str):
+        # Daemon thread: a stuck ingestion loop never blocks process exit
+        super().__init__(name="ais-ingestion", daemon=True)
+        self.api_key = api_key
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def run(self):
+        run_event_loop(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        await run_ingestion(self.api_key)
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Cancels the ingestion pipeline and waits for its thread to finish.
+
+        Args:
+            timeout (float): Maximum time to wait for the thread, in seconds.
+        """
+        if self._loop is not None and self._task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # Loop already closed
+        await asyncio.to_thread(self.join, timeout)
+
+
 async def run_logic():
     """
     Core business logic loop: Manages Database connectivity and AIS data stream.
@@ -135,11 +210,14 @@ async def run_logic():
     await repo.initialize()
 
     api_key = os.getenv("AIS_API_KEY")
-    ingestion_task = None
+    ingestion: Optional[IngestionThread] = None
 
     if api_key:
-        logger.info("📡 Launching background AIS ingestion task...")
-        ingestion_task = asyncio.create_task(start_ais_ingestion(repo, api_key, detector))
+        logger.info("📡 Launching AIS ingestion on a dedicated event loop thread...")
+        # Broadcasts from the ingestion thread are scheduled back onto this loop
+        manager.bind_loop(asyncio.get_running_loop())
+        ingestion = IngestionThread(api_key)
+        ingestion.start()
     else:
         logger.warning("⚠️ AIS_API_KEY missing. System running in read-only mode.")
 
@@ -148,8 +226,8 @@ async def run_logic():
         while True:
             await asyncio.sleep(3600)
     finally:
-        if ingestion_task:
-            ingestion_task.cancel()
+        if ingestion is not None:
+            await ingestion.stop()
         await repo.close()
         logger.info("⚓ Core logic shut down.")
 
@@ -187,6 +265,8 @@ async def start_all():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(start_all())
+        if uvloop is not None:
+            logger.info("⚡ Running on the uvloop event loop.")
+        run_event_loop(start_all())
     except KeyboardInterrupt:
         logger.info("⚓ Manual system shutdown initiated.")
\ No newline at end of file
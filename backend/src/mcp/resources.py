@@ -3,22 +3,8 @@ import logging
 # Logger configuration
 logger = logging.getLogger("MCP_Resources")
 
-
-def register_resources(mcp):
-    """
-    Registers static and dynamic informational assets for the AI model.
-
-    Resources act as a 'knowledge base' that Claude can reference to
-    contextualize real-time vessel behavior against known infrastructure.
-    """
-
-    @mcp.resource("maritime://critical-infrastructure")
-    def get_infrastructure() -> str:
-        """
-        Returns a list of high-value offshore assets and their coordinates.
-        Used for identifying potential targets or sensitive navigation areas.
-        """
-        return """
+# Static resource documents, built once at import and shared by every request
+_INFRASTRUCTURE_DOC = """
         # STRATEGIC OIL & GAS PLATFORMS
         - Troll A: 60.64, 3.72 (World's tallest moved structure, crucial gas hub)
         - Sleipner Field: 58.36, 1.91 (Major carbon capture and storage site)
@@ -33,13 +19,7 @@ def register_resources(mcp):
         - Nordlink: 58.20, 6.50 (High-voltage DC link between Norway and Germany)
         """
 
-    @mcp.resource("maritime://security-zones")
-    def get_security_zones() -> str:
-        """
-        Returns the definitions and severity levels of monitored geofence zones.
-        Matches the database entries in the 'geofences' table.
-        """
-        return """
+_SECURITY_ZONES_DOC = """
         # PROTECTED MARITIME ZONES (Geofences)
 
         1. Bergen Port Safety Zone (CRITICAL)
@@ -59,4 +39,29 @@ def register_resources(mcp):
            - Focus: Monitoring for GPS jamming clusters and dark target detection.
         """
 
+
+def register_resources(mcp):
+    """
+    Registers static and dynamic informational assets for the AI model.
+
+    Resources act as a 'knowledge base' that Claude can reference to
+    contextualize real-time vessel behavior against known infrastructure.
+    """
+
+    @mcp.resource("maritime://critical-infrastructure")
+    def get_infrastructure() -> str:
+        """
+        Returns a list of high-value offshore assets and their coordinates.
+        Used for identifying potential targets or sensitive navigation areas.
+        """
+        return _INFRASTRUCTURE_DOC
+
+    @mcp.resource("maritime://security-zones")
+    def get_security_zones() -> str:
+        """
+        Returns the definitions and severity levels of monitored geofence zones.
+        Matches the database entries in the 'geofences' table.
+        """
+        return _SECURITY_ZONES_DOC
+
     logger.info("📦 MCP Resources registered (Infrastructure & Security Zones).")
\ No newline at end of file
@@ -1,11 +1,40 @@
-import json
+import time
+import contextlib
+import orjson
 import logging
+from typing import Dict, Hashable, Optional, Tuple
 from src.db.repository import AISRepository
 from src.core.anomalies import AnomalyDetector
 
 # Logger configuration
 logger = logging.getLogger("MCP_Tools")
 
+# Repeated tool calls within this window reuse the previous response
+TOOL_CACHE_TTL = 5.0  # seconds
+
+# Native serialization: datetimes and NumPy values are encoded without Python callbacks
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+
+class _TTLCache:
+    """Minimal time-based cache for serialized tool responses."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, str]] = {}
+
+    def get(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def put(self, key: Hashable, value: str):
+        now = time.monotonic()
+        # Drop expired entries so varying keys cannot grow the cache without bound
+        self._entries = {k: e for k, e in self._entries.items() if now - e[0] < self.ttl}
+        self._entries[key] = (now, value)
+
 
 def register_tools(mcp, repo: AISRepository, detector: AnomalyDetector):
     """
@@ -13,7 +42,10 @@ def register_tools(mcp, repo: AISRepository, detector: AnomalyDetector):
 
     These tools allow the AI to interact directly with the maritime database
     and the security analysis engine, enabling real-time responses to queries.
+    Responses are cached for TOOL_CACHE_TTL seconds per normalized input.
     """
+    area_cache = _TTLCache(TOOL_CACHE_TTL)
+    analysis_cache = _TTLCache(TOOL_CACHE_TTL)
 
     @mcp.tool()
     async def get_ships_in_area(lat: float, lon: float, radius_km: float = 50.0) -> str:
@@ -28,10 +60,26 @@ def register_tools(mcp, repo: AISRepository, detector: AnomalyDetector):
             lon (float): Center longitude.
             radius_km (float): Search radius in kilometers (default 50.0).
         """
+        # Normalized key: ~100m precision is plenty for area queries
+        key = (round(lat, 3), round(lon, 3), round(radius_km, 3))
+        cached = area_cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
             logger.info(f"🔍 MCP Tool Call: Fetching vessels near ({lat}, {lon}) in {radius_km}km radius.")
-            vessels = await repo.get_vessels_in_radius(lat, lon, radius_km)
-            return json.dumps(vessels, indent=2, default=str)
+            # Rows are serialized as they stream in, without an intermediate list
+            payload = bytearray(b"[")
+            # aclosing: the cursor and pooled connection are released even if serialization fails
+            async with contextlib.aclosing(repo.iter_vessels_in_radius(lat, lon, radius_km)) as vessels:
+                async for vessel in vessels:
+                    if len(payload) > 1:
+                        payload += b","
+                    payload += orjson.dumps(vessel, default=str)
+            payload += b"]"
+            result = payload.decode()
+            area_cache.put(key, result)
+            return result
         except Exception as e:
             logger.error(f"❌ Database error during vessel lookup: {e}")
             return f"Database error occurred: {str(e)}"
@@ -47,14 +95,21 @@ def register_tools(mcp, repo: AISRepository, detector: AnomalyDetector):
         Args:
             threshold_min (int): Minutes of inactivity to trigger an alert (default 15).
         """
+        cached = analysis_cache.get(threshold_min)
+        if cached is not None:
+            return cached
+
         try:
             logger.info(f"🛡️ MCP Tool Call: Running security analysis (threshold: {threshold_min}min).")
             data = await detector.get_enhanced_anomalies(threshold_min)
 
             if not data["alerts"]:
-                return "✅ No maritime anomalies detected in the specified time window."
+                result = "✅ No maritime anomalies detected in the specified time window."
+            else:
+                result = orjson.dumps(data, default=str, option=JSON_OPTIONS).decode()
 
-            return json.dumps(data, indent=2, default=str)
+            analysis_cache.put(threshold_min, result)
+            return result
         except Exception as e:
             logger.error(f"❌ Security analysis failed: {e}")
             return f"Analysis error occurred: {str(e)}"
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+import orjson
+from unittest.mock import AsyncMock, MagicMock
+from src.api import ais_client
+
+"""
+Unit testing module for the AIS ingestion pipeline.
+
+Validates the adaptive flush policy of the database consumer by feeding
+frames through a mocked AISStream WebSocket and observing when batches
+reach the (mocked) repository.
+"""
+
+
+def _frame(mmsi: int) -> bytes:
+    """Builds a minimal AISStream position report frame."""
+    return orjson.dumps({
+        "MessageType": "PositionReport",
+        "MetaData": {"MMSI": mmsi, "ShipName": "TEST", "latitude": 60.40, "longitude": 5.30},
+        "Message": {"PositionReport": {"Sog": 10.0, "Cog": 90.0}},
+    })
+
+
+class _FakeStream:
+    """AISStream connection stub: yields the given frames, then stays open."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.send = AsyncMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        for frame in self.frames:
+            yield frame
+        await asyncio.Event().wait()
+
+
+async def _run_ingestion(monkeypatch, frames):
+    """Starts the ingestion loop against the fake stream with mocked dependencies."""
+    mock_repo = AsyncMock()
+    # The consumer reuses its buffer, so keep a copy of every flushed batch
+    mock_repo.flushed = []
+    mock_repo.update_vessels_batch.side_effect = lambda batch: mock_repo.flushed.append(list(batch))
+    mock_detector = AsyncMock()
+    mock_detector.check_geofence_violations_batch.return_value = []
+    monkeypatch.setattr(ais_client.websockets, "connect", MagicMock(return_value=_FakeStream(frames)))
+    task = asyncio.create_task(ais_client.start_ais_ingestion(mock_repo, "test-key", mock_detector))
+    return task, mock_repo
+
+
+async def _wait_for_flush(mock_repo, timeout: float = 1.0):
+    """Polls the mocked repository until the consumer has persisted a batch."""
+    async def flushed():
+        while not mock_repo.update_vessels_batch.await_count:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(flushed(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_db_writer_flushes_partial_batch_after_latency(monkeypatch):
+    """
+    Test that a partially filled batch is flushed once MAX_BATCH_LATENCY expires.
+
+    Scenario:
+        - Three vessel reports arrive, well below the minimum batch size.
+        - No further traffic follows.
+        - Expected result: Nothing is written early; the three records are
+          persisted together after the latency window.
+    """
+    monkeypatch.setattr(ais_client, "MAX_BATCH_LATENCY", 0.3)
+    task, mock_repo = await _run_ingestion(monkeypatch, [_frame(257000001 + i) for i in range(3)])
+
+    try:
+        # Execution: records are buffered but the latency window is still open
+        await asyncio.sleep(0.1)
+        mock_repo.update_vessels_batch.assert_not_awaited()
+
+        await _wait_for_flush(mock_repo)
+    finally:
+        task.cancel()
+
+    # Assertion: A single flush carrying every buffered record
+    assert [[v["mmsi"] for v in batch] for batch in mock_repo.flushed] == [[257000001, 257000002, 257000003]]
+    print("✅ Latency flush test passed!")
+
+
+@pytest.mark.asyncio
+async def test_db_writer_flushes_full_batch_immediately(monkeypatch):
+    """
+    Test that a batch reaching the target size is flushed without waiting.
+
+    Scenario:
+        - The minimum batch size is 3 and the latency window is one minute.
+        - Three vessel reports arrive back to back.
+        - Expected result: The batch is persisted right away, long before
+          the latency window would expire.
+    """
+    monkeypatch.setattr(ais_client, "MIN_BATCH_SIZE", 3)
+    monkeypatch.setattr(ais_client, "MAX_BATCH_LATENCY", 60.0)
+    task, mock_repo = await _run_ingestion(monkeypatch, [_frame(257000001 + i) for i in range(3)])
+
+    # Execution
+    try:
+        await _wait_for_flush(mock_repo)
+    finally:
+        task.cancel()
+
+    # Assertion: The full batch was written in one go
+    assert [len(batch) for batch in mock_repo.flushed] == [3]
+    print("✅ Full batch flush test passed!")
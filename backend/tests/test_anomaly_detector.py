@@ -1,4 +1,6 @@
 import pytest
+import shapely
+import numpy as np
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime, timezone, timedelta
 from src.core.anomalies import AnomalyDetector
@@ -44,6 +46,46 @@ async def test_calculate_predicted_pos():
     print(f"✅ Dead Reckoning test passed: Predicted Lat {predicted['lat']}")
 
 
+def test_calculate_predicted_pos_with_reference_time():
+    """
+    Test Dead Reckoning against an explicit reference time.
+
+    Verifies that a caller-supplied 'now' is used instead of the wall clock,
+    which makes the prediction deterministic.
+
+    Scenario:
+        - Vessel heading East (90°) at 30 knots on the equator.
+        - Reference time exactly 2 hours after the last signal.
+        - Expected result: Longitude increases by exactly 1 degree (60 nautical miles).
+    """
+    detector = AnomalyDetector(repo=MagicMock())
+    last_seen = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    predicted = detector.calculate_predicted_pos(0.0, 10.0, 30.0, 90.0, last_seen, now=last_seen + timedelta(hours=2))
+
+    assert predicted == {"lat": 0.0, "lon": 11.0}
+
+
+def test_calculate_predicted_pos_batch():
+    """
+    Test the vectorized Dead Reckoning used for all inactive vessels at once.
+
+    Scenario:
+        - Vessel A heading North at 20 knots for 1 hour.
+        - Vessel B drifting at 0.2 knots (below the 0.5 knot movement threshold).
+        - Expected result: A moves 20 nautical miles North, B keeps its last position.
+    """
+    detector = AnomalyDetector(repo=MagicMock())
+
+    pred_lat, pred_lon = detector.calculate_predicted_pos_batch(
+        np.array([60.0, 55.0]), np.array([10.0, 3.0]), np.array([20.0, 0.2]),
+        np.array([0.0, 90.0]), np.array([1.0, 5.0])
+    )
+
+    assert pred_lat.tolist() == [round(60.0 + 20.0 / 60.0, 6), 55.0]
+    assert pred_lon.tolist() == [10.0, 3.0]
+
+
 @pytest.mark.asyncio
 async def test_get_enhanced_anomalies_jamming_detection():
     """
@@ -74,4 +116,134 @@ async def test_get_enhanced_anomalies_jamming_detection():
     assert len(result["clusters"]) > 0
     assert result["clusters"][0]["type"] == "POTENTIAL_JAMMING_ZONE"
     assert "1" in result["clusters"][0]["affected_mmsi"]
-    print(f"✅ Jamming cluster detection test passed! Found: {len(result['clusters'])} clusters.")
\ No newline at end of file
+    print(f"✅ Jamming cluster detection test passed! Found: {len(result['clusters'])} clusters.")
+
+
+@pytest.mark.asyncio
+async def test_check_geofence_violations_batch():
+    """
+    Test the batched geofence verification used by the ingestion pipeline.
+
+    Verifies that rows returned by the single batched spatial query are
+    mapped back to their position in the submitted batch.
+
+    Scenario:
+        - Batch of 3 vessels, the second one inside the Bergen Port Safety Zone.
+        - Expected result: Exactly one violation, pointing at index 1.
+    """
+    mock_repo = AsyncMock()
+    mock_repo.check_points_in_geofences_batch.return_value = [
+        {"idx": 1, "name": "Bergen Port Safety Zone", "severity": "CRITICAL"},
+    ]
+
+    detector = AnomalyDetector(repo=mock_repo)
+    points = [(50.0, 10.0), (60.40, 5.30), (55.0, 2.0)]
+
+    # Execution
+    violations = await detector.check_geofence_violations_batch(points)
+
+    # Assertion: One round-trip for the whole batch, index preserved
+    mock_repo.check_points_in_geofences_batch.assert_awaited_once_with(points)
+    assert violations == [(1, {"name": "Bergen Port Safety Zone", "severity": "CRITICAL"})]
+    print(f"✅ Batch geofence test passed: {violations}")
+
+
+@pytest.mark.asyncio
+async def test_geofence_index_local_lookup():
+    """
+    Test the in-memory geofence index (STRtree) used on the ingestion hot path.
+
+    Verifies that once geofences are loaded, point-in-polygon checks are
+    answered locally without querying the database.
+
+    Scenario:
+        - Repository provides the Bergen Port Safety Zone polygon as WKB.
+        - One point inside the zone and one point far outside.
+        - Expected result: Only the inside point is flagged, no per-point DB calls.
+    """
+    bergen = shapely.box(5.25, 60.38, 5.35, 60.42)
+    mock_repo = AsyncMock()
+    mock_repo.get_geofences.return_value = [
+        {"name": "Bergen Port Safety Zone", "severity": "CRITICAL", "area": shapely.to_wkb(bergen)},
+    ]
+
+    detector = AnomalyDetector(repo=mock_repo)
+    await detector.load_geofences()
+
+    # Execution
+    inside = await detector.check_geofence_violation(60.40, 5.30)
+    outside = await detector.check_geofence_violation(50.0, 10.0)
+    violations = await detector.check_geofence_violations_batch([(50.0, 10.0), (60.40, 5.30)])
+
+    # Assertion: Local index answers both single and batched lookups
+    assert inside == {"name": "Bergen Port Safety Zone", "severity": "CRITICAL"}
+    assert outside is None
+    assert violations == [(1, inside)]
+    mock_repo.check_point_in_geofence.assert_not_awaited()
+    mock_repo.check_points_in_geofences_batch.assert_not_awaited()
+    print("✅ Geofence index test passed!")
+
+
+@pytest.mark.asyncio
+async def test_geofence_index_rejects_malformed_points():
+    """
+    Test that malformed points are skipped without hiding real violations.
+
+    The batched check runs inside the ingestion writer loop; an exception there
+    would stop every subsequent flush, and dropping the whole batch would lose
+    the alerts of every valid vessel in it.
+
+    Scenario:
+        - Geofence index is loaded with the Bergen Port Safety Zone.
+        - A batch contains a point inside the zone, then points with a missing
+          and a non-finite longitude.
+        - Expected result: The valid point is still reported as a violation.
+    """
+    mock_repo = AsyncMock()
+    mock_repo.get_geofences.return_value = [
+        {"name": "Bergen Port Safety Zone", "severity": "CRITICAL", "area": shapely.to_wkb(shapely.box(5.25, 60.38, 5.35, 60.42))},
+    ]
+
+    detector = AnomalyDetector(repo=mock_repo)
+    await detector.load_geofences()
+
+    # Execution
+    violations = await detector.check_geofence_violations_batch([(60.40, 5.30), (60.40, None), (60.40, float("nan"))])
+
+    # Assertion: Only the valid point is checked, and its violation is kept
+    assert violations == [(0, {"name": "Bergen Port Safety Zone", "severity": "CRITICAL"})]
+    mock_repo.check_points_in_geofences_batch.assert_not_awaited()
+    print("✅ Malformed point test passed!")
+
+
+@pytest.mark.asyncio
+async def test_get_enhanced_anomalies_ignores_isolated_vessels():
+    """
+    Test that jamming zones only group vessels that went dark close together.
+
+    Scenario:
+        - 3 inactive vessels within ~3km of each other near Bergen.
+        - 1 inactive vessel far away in the Skagerrak, plus a pair that is too small to count.
+        - Expected result: A single jamming zone containing exactly the 3 clustered vessels.
+    """
+    now = datetime.now(timezone.utc)
+    mock_repo = AsyncMock()
+    mock_repo.get_inactive_vessels.return_value = [
+        {"mmsi": "1", "name": "S1", "lat": 60.40, "lon": 5.30, "speed": 0.0, "last_seen": now},
+        {"mmsi": "2", "name": "S2", "lat": 60.41, "lon": 5.31, "speed": 0.0, "last_seen": now},
+        {"mmsi": "3", "name": "S3", "lat": 60.42, "lon": 5.32, "speed": 0.0, "last_seen": now},
+        {"mmsi": "4", "name": "S4", "lat": 58.00, "lon": 9.00, "speed": 0.0, "last_seen": now},
+        {"mmsi": "5", "name": "S5", "lat": 61.50, "lon": 4.00, "speed": 0.0, "last_seen": now},
+        {"mmsi": "6", "name": "S6", "lat": 61.51, "lon": 4.01, "speed": 0.0, "last_seen": now},
+    ]
+
+    detector = AnomalyDetector(repo=mock_repo)
+
+    # Execution
+    result = await detector.get_enhanced_anomalies(threshold_min=15)
+
+    # Assertion: Every vessel is reported, but only one zone is flagged
+    assert len(result["alerts"]) == 6
+    assert len(result["clusters"]) == 1
+    assert sorted(result["clusters"][0]["affected_mmsi"]) == ["1", "2", "3"]
+    assert result["clusters"][0]["center"] == {"lat": 60.41, "lon": 5.31}
@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.websockets import WebSocketState
+from src.api import broadcaster
+from src.api.broadcaster import ConnectionManager
+
+"""
+Unit testing module for the real-time WebSocket broadcaster.
+
+Validates back-pressure handling of the fan-out: clients that stall or fail
+are dropped exactly once, while healthy clients keep receiving updates.
+"""
+
+
+def _client(send_bytes=None):
+    """Builds a connected WebSocket stub with the given send behaviour."""
+    websocket = MagicMock(application_state=WebSocketState.CONNECTED)
+    websocket.send_bytes = send_bytes or AsyncMock()
+    websocket.close = AsyncMock()
+    return websocket
+
+
+async def _stall(_):
+    """Send that never completes, like a client with a full TCP window."""
+    await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_stalled_client(monkeypatch):
+    """
+    Test that a stalled client cannot hold up the broadcast.
+
+    Scenario:
+        - One healthy client and one client whose send never completes.
+        - Expected result: The broadcast returns after SEND_TIMEOUT, the healthy
+          client receives the payload and the stalled client is dropped.
+    """
+    monkeypatch.setattr(broadcaster, "SEND_TIMEOUT", 0.05)
+    healthy = _client()
+    slow = _client(AsyncMock(side_effect=_stall))
+
+    manager = ConnectionManager()
+    manager.active_connections.update({healthy, slow})
+
+    # Execution
+    await asyncio.wait_for(manager.broadcast({"type": "VESSEL_UPDATE", "data": []}), timeout=1.0)
+
+    # Assertion
+    healthy.send_bytes.assert_awaited_once_with(b'{"type":"VESSEL_UPDATE","data":[]}')
+    assert manager.active_connections == {healthy}
+    print("✅ Stalled client test passed!")
+
+
+@pytest.mark.asyncio
+async def test_broadcast_prunes_failed_clients_once(monkeypatch):
+    """
+    Test that stalled and failing clients are disconnected after a broadcast.
+
+    Scenario:
+        - One healthy client, one client whose send never completes and one
+          client whose send raises.
+        - Expected result: The healthy client receives the payload; each failed
+          client is disconnected exactly once, after all sends have finished,
+          and the timed-out client's socket is closed so its dashboard notices.
+    """
+    monkeypatch.setattr(broadcaster, "SEND_TIMEOUT", 0.05)
+
+    healthy = _client()
+    slow = _client(AsyncMock(side_effect=_stall))
+    broken = _client(AsyncMock(side_effect=RuntimeError("connection reset")))
+
+    manager = ConnectionManager()
+    manager.active_connections.update({healthy, slow, broken})
+    manager.disconnect = MagicMock(wraps=manager.disconnect)
+
+    # Execution
+    await manager.broadcast({"type": "VESSEL_UPDATE", "data": []})
+
+    # Assertion: Only the failed clients were pruned, one call each
+    healthy.send_bytes.assert_awaited_once_with(b'{"type":"VESSEL_UPDATE","data":[]}')
+    assert manager.disconnect.call_count == 2
+    manager.disconnect.assert_any_call(slow)
+    manager.disconnect.assert_any_call(broken)
+    assert manager.active_connections == {healthy}
+
+    # Assertion: The stalled client is told to retry later via a close frame
+    await asyncio.sleep(0)
+    slow.close.assert_awaited_once_with(code=1013)
+    healthy.close.assert_not_awaited()
+    broken.close.assert_not_awaited()
+    print("✅ Broadcast pruning test passed!")
+
+
+@pytest.mark.asyncio
+async def test_broadcast_skips_closing_clients():
+    """
+    Test that clients already closing are pruned without a send attempt.
+
+    Scenario:
+        - A client whose application state is DISCONNECTED is still registered.
+        - Expected result: No bytes are written to it and it is removed.
+    """
+    closing = _client()
+    closing.application_state = WebSocketState.DISCONNECTED
+
+    manager = ConnectionManager()
+    manager.active_connections.add(closing)
+
+    # Execution
+    await manager.broadcast({"type": "ALERT", "data": {}})
+
+    # Assertion
+    closing.send_bytes.assert_not_awaited()
+    assert not manager.has_clients()
+    print("✅ Closing client test passed!")
+
+
+@pytest.mark.asyncio
+async def test_broadcast_threadsafe_serializes_eagerly_without_waiting():
+    """
+    Test that publishing from the ingestion pipeline does not wait for delivery.
+
+    The ingestion writer clears its batch buffer right after a flush, so the
+    payload must be serialized before broadcast_threadsafe returns.
+
+    Scenario:
+        - One connected client whose send takes a while.
+        - The published batch list is cleared right after the call.
+        - Expected result: The call returns before the send completes, and the
+          client later receives the batch as it was when published.
+    """
+    async def slow_send(_):
+        await asyncio.sleep(0.05)
+
+    client = _client(AsyncMock(side_effect=slow_send))
+    manager = ConnectionManager()
+    manager.active_connections.add(client)
+    batch = [{"mmsi": 257000001}]
+
+    # Execution
+    manager.broadcast_threadsafe({"type": "VESSEL_UPDATE", "data": batch})
+    batch.clear()
+    client.send_bytes.assert_not_awaited()
+    await asyncio.sleep(0.1)
+
+    # Assertion: Delivered in the background with the original contents
+    client.send_bytes.assert_awaited_once_with(b'{"type":"VESSEL_UPDATE","data":[{"mmsi":257000001}]}')
+    print("✅ Threadsafe broadcast test passed!")
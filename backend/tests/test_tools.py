@@ -0,0 +1,39 @@
+from src.mcp import tools
+from src.mcp.tools import _TTLCache
+
+"""
+Unit testing module for the MCP tool helpers.
+
+Validates the response cache shared by the tools, using a controllable
+clock instead of real waiting.
+"""
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    """
+    Test that cached tool responses are served only within the TTL window.
+
+    Scenario:
+        - A response is cached at t=100s with a 5 second TTL.
+        - Lookups happen at t=104s and t=105s; a second key is stored at t=106s.
+        - Expected result: Hit before expiry, miss at expiry, and the stale
+          entry is evicted when the new one is stored.
+    """
+    clock = [100.0]
+    monkeypatch.setattr(tools.time, "monotonic", lambda: clock[0])
+    cache = _TTLCache(ttl=5.0)
+
+    # Execution
+    cache.put("area", "[]")
+    clock[0] = 104.0
+    hit = cache.get("area")
+    clock[0] = 105.0
+    miss = cache.get("area")
+    clock[0] = 106.0
+    cache.put("analysis", "{}")
+
+    # Assertion
+    assert hit == "[]"
+    assert miss is None
+    assert list(cache._entries) == ["analysis"]
+    print("✅ TTL cache test passed!")
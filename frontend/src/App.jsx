@@ -83,6 +83,9 @@ function App() {
          * Connects to the Maritime Intelligence System for real-time updates.
          */
         const socket = new WebSocket('ws://localhost:8000/ws');
+        // Broadcasts arrive as pre-encoded UTF-8 binary frames
+        socket.binaryType = 'arraybuffer';
+        const decoder = new TextDecoder();
 
         socket.onopen = () => {
             console.log("🔌 WebSocket Connection Established (Status: OPEN)");
@@ -91,7 +94,8 @@ function App() {
 
         socket.onmessage = (event) => {
             try {
-                const message = JSON.parse(event.data);
+                const raw = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+                const message = JSON.parse(raw);
 
                 if (message.type === "VESSEL_UPDATE") {
                     setVessels(prev => {
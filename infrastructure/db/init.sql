@@ -25,6 +25,9 @@ CREATE TABLE IF NOT EXISTS geofences (
 CREATE INDEX IF NOT EXISTS idx_vessels_pos ON vessels USING GIST (last_pos);
 CREATE INDEX IF NOT EXISTS idx_geofences_area ON geofences USING GIST (area);
 
+-- B-tree on last_seen for inactive vessel scans (time window + ORDER BY last_seen DESC)
+CREATE INDEX IF NOT EXISTS idx_vessels_last_seen ON vessels (last_seen DESC);
+
 -- --- INITIAL DATA SEEDING ---
 
 -- A. Bergen Port Safety Zone (Strategic Harbor Entrance)